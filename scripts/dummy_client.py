@@ -6,20 +6,46 @@ This script spawns multiple test clients to connect to the R-Type server
 and optionally send READY_STATUS packets. Useful for testing lobby and
 ready state functionality.
 
+All clients share a single asyncio event loop, so large client counts do
+not cost one OS thread each.
+
 Usage:
-    python3 scripts/dummy_client.py [host] [port]
+    python3 scripts/dummy_client.py [host] [port] [--connect-timeout SECONDS] [--timeout SECONDS] [-v|-vv]
     
 Example:
     python3 scripts/dummy_client.py localhost 50000
+    
+    # Fail fast on a dead server, be patient once connected
+    python3 scripts/dummy_client.py localhost 50000 --connect-timeout 0.2 --timeout 10
 """
 
+import argparse
+import asyncio
+import logging
 import socket
 import struct
-import sys
-import time
 from typing import Optional
 
 
+# Per-client messages; only warnings are shown unless -v/--verbose is given
+log = logging.getLogger('dummy_client')
+
+# Timeouts (seconds): connecting is short so a dead server is detected quickly
+# even with many clients, reading the server's replies can take longer
+DEFAULT_CONNECT_TIMEOUT = 0.5
+DEFAULT_READ_TIMEOUT = 5.0
+
+# Precompiled packet layouts - Little Endian as per RFC Section 1.2
+# Header (12 bytes): OpCode (u8) + PayloadSize (u16) + PacketIndex (u8) + TickId (u32) + PacketCount (u8) + Reserved (u8[3])
+# The reserved bytes are always zero, so they are a constant suffix rather than packed fields
+_HEADER = struct.Struct('<BHBIB')
+_RESERVED3 = b'\x00\x00\x00'
+_HEADER_SIZE = _HEADER.size + len(_RESERVED3)
+# CONNECT_ACK payload: PlayerId (u8) + Status (u8) + Reserved (u8[2])
+_ACK_PAYLOAD = struct.Struct('<BBBB')
+# READY_STATUS payload: IsReady (u8) + Reserved (u8[3])
+_READY_PAYLOAD = struct.Struct('<BBBB')
+
 # Packet types from RFC (server/include/server/PacketTypes.hpp)
 class PacketType:
     CONNECT_REQ = 0x01
@@ -31,181 +57,253 @@ class PacketType:
     READY_STATUS = 0x07
 
 
+_PACKET_NAMES = {value: name for name, value in vars(PacketType).items() if name.isupper()}
+
+# CONNECT_ACK status codes
+_STATUS_NAMES = {0: "OK", 1: "ServerFull", 2: "BadUsername", 3: "InGame"}
+
+
+def _truncate_utf8(text: str, max_bytes: int) -> bytes:
+    """Encode text as UTF-8, keeping at most max_bytes without splitting a character."""
+    # Each character takes at least one byte: the rest of the string can never fit
+    encoded = text[:max_bytes].encode('utf-8', 'replace')
+    if len(encoded) <= max_bytes:
+        return encoded
+    
+    # Back off while the first dropped byte continues a multi-byte character
+    end = max_bytes
+    while end and encoded[end] & 0xC0 == 0x80:
+        end -= 1
+    return encoded[:end]
+
+
 class DummyClient:
     """A simple R-Type client for testing purposes."""
     
-    def __init__(self, client_id: int, host: str, port: int):
+    # Headers of TCP packets are constant: PacketIndex = 0, TickId = 0 (TCP), PacketCount = 1
+    _CONNECT_REQ_HEADER = _HEADER.pack(PacketType.CONNECT_REQ, 32, 0, 0, 1) + _RESERVED3
+    _READY_HEADER = _HEADER.pack(PacketType.READY_STATUS, 4, 0, 0, 1) + _RESERVED3
+    
+    # READY_STATUS payload only carries the flag, so both packets are fully known
+    _READY_PACKET_READY = _READY_HEADER + _READY_PAYLOAD.pack(1, 0, 0, 0)
+    _READY_PACKET_NOT_READY = _READY_HEADER + _READY_PAYLOAD.pack(0, 0, 0, 0)
+    
+    def __init__(self, client_id: int, host: str, port: int,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT):
         self.client_id = client_id
         self.host = host
         self.port = port
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
         self.sock: Optional[socket.socket] = None
         self.player_id: Optional[int] = None
         self.username = f"TestClient{client_id}"
         
-    def connect(self) -> bool:
+        # The username never changes, so the whole CONNECT_REQ is built once
+        # Payload: Username (32 bytes, null-terminated)
+        username_bytes = _truncate_utf8(self.username, 31)  # Max 31 bytes + null terminator
+        self._connect_packet = self._CONNECT_REQ_HEADER + username_bytes.ljust(32, b'\x00')
+        
+        # Reusable receive buffer: packets are read in place instead of allocating per recv
+        self._rbuf = bytearray(64)
+        self._mv = memoryview(self._rbuf)
+        
+    async def run(self, send_ready: bool) -> bool:
+        """Connect to the server, then send READY_STATUS if requested and authenticated."""
+        success = await self.connect()
+        
+        if not self.sock:
+            log.warning("[Client %d] Failed to establish TCP connection, skipping...", self.client_id)
+        elif success and send_ready:
+            await asyncio.sleep(0.5)  # Small delay before sending ready
+            await self.send_ready_status(is_ready=True)
+        
+        return success
+    
+    async def connect(self) -> bool:
         """Connect to the server and send CONNECT_REQ packet."""
+        loop = asyncio.get_running_loop()
         try:
             self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.sock.settimeout(5.0)
+            self.sock.setblocking(False)
+            # Handshake packets are tiny: don't let Nagle hold them back
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             
-            print(f"[Client {self.client_id}] Connecting to {self.host}:{self.port}...")
-            self.sock.connect((self.host, self.port))
-            print(f"[Client {self.client_id}] Connected successfully")
+            log.info("[Client %d] Connecting to %s:%d...", self.client_id, self.host, self.port)
+            await self._with_timeout(loop.sock_connect(self.sock, (self.host, self.port)), self.connect_timeout)
+            if hasattr(socket, 'TCP_QUICKACK'):  # Linux only: ACK the server's reply immediately
+                self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+            log.debug("[Client %d] Connected successfully", self.client_id)
             
             # Send CONNECT_REQ packet
-            self._send_connect_req()
+            await self._send_connect_req()
             
             # Wait for CONNECT_ACK (connection stays open regardless of status)
-            return self._receive_connect_ack()
+            return await self._receive_connect_ack()
             
         except Exception as e:
-            print(f"[Client {self.client_id}] Connection failed: {e}")
+            log.warning("[Client %d] Connection failed: %s", self.client_id, e)
             if self.sock:
                 self.sock.close()
                 self.sock = None
             return False
     
-    def _send_connect_req(self):
+    @staticmethod
+    async def _with_timeout(operation, timeout: Optional[float]):
+        """Await a socket operation, failing like a blocking socket would on timeout."""
+        try:
+            return await asyncio.wait_for(operation, timeout)
+        except asyncio.TimeoutError:
+            raise socket.timeout("timed out") from None
+    
+    async def _recv_exact(self, n: int, offset: int = 0,
+                          timeout: Optional[float] = None) -> memoryview:
+        """Receive exactly n bytes into the receive buffer at offset, looping over short reads (no timeout by default)."""
+        loop = asyncio.get_running_loop()
+        end = offset + n
+        while offset < end:
+            got = await self._with_timeout(loop.sock_recv_into(self.sock, self._mv[offset:end]), timeout)
+            if not got:
+                raise ConnectionError("Connection closed by server")
+            offset += got
+        return self._mv[end - n:end]
+    
+    async def _send_connect_req(self):
         """Send CONNECT_REQ packet (opcode 0x01)."""
-        # Header (12 bytes): OpCode (u8) + PayloadSize (u16) + PacketIndex (u8) + TickId (u32) + PacketCount (u8) + Reserved (u8[3])
-        # Payload: Username (32 bytes, null-terminated)
-        
-        op_code = PacketType.CONNECT_REQ
-        payload_size = 32
-        packet_index = 0  # Single packet
-        tick_id = 0  # TCP packets use TickId = 0
-        packet_count = 1  # Single packet
-        reserved = (0, 0, 0)  # 3 reserved bytes
-        
-        # Prepare username (32 bytes, null-padded)
-        username_bytes = self.username.encode('utf-8')[:31]  # Max 31 chars + null terminator
-        username_padded = username_bytes + b'\x00' * (32 - len(username_bytes))
-        
-        # Pack header (12 bytes) - Little Endian as per RFC Section 1.2
-        header = struct.pack(
-            '<BHBIBBBB',  # Little-endian: u8, u16, u8, u32, u8, u8, u8, u8
-            op_code,
-            payload_size,
-            packet_index,
-            tick_id,
-            packet_count,
-            reserved[0],
-            reserved[1],
-            reserved[2]
-        )
-        
-        # Complete packet = header + payload
-        packet = header + username_padded
-        
-        print(f"[Client {self.client_id}] Sending CONNECT_REQ with username '{self.username}'")
-        self.sock.sendall(packet)
+        log.debug("[Client %d] Sending CONNECT_REQ with username '%s'", self.client_id, self.username)
+        await asyncio.get_running_loop().sock_sendall(self.sock, self._connect_packet)
     
-    def _receive_connect_ack(self) -> bool:
+    async def _receive_connect_ack(self) -> bool:
         """Receive and parse CONNECT_ACK packet."""
         try:
             # Receive header (12 bytes)
-            header = self.sock.recv(12)
-            if len(header) != 12:
-                print(f"[Client {self.client_id}] Failed to receive complete header")
-                return False
+            await self._recv_exact(_HEADER_SIZE, timeout=self.read_timeout)
             
-            # Parse header: OpCode (u8) + PayloadSize (u16) + PacketIndex (u8) + TickId (u32) + PacketCount (u8) + Reserved (u8[3])
-            op_code, payload_size, packet_index, tick_id, packet_count, res1, res2, res3 = struct.unpack('<BHBIBBBB', header)
+            # Parse header: OpCode (u8) + PayloadSize (u16) + PacketIndex (u8) + TickId (u32) + PacketCount (u8), reserved bytes ignored
+            op_code, payload_size, packet_index, tick_id, packet_count = _HEADER.unpack_from(self._rbuf, 0)
             
             if op_code != PacketType.CONNECT_ACK:
-                print(f"[Client {self.client_id}] Expected CONNECT_ACK (0x02), got 0x{op_code:02x}")
+                log.warning("[Client %d] Expected CONNECT_ACK (0x02), got 0x%02x", self.client_id, op_code)
                 return False
             
-            # Receive payload (4 bytes)
-            payload = self.sock.recv(payload_size)
-            if len(payload) != payload_size:
-                print(f"[Client {self.client_id}] Failed to receive complete payload")
+            if not _ACK_PAYLOAD.size <= payload_size <= len(self._rbuf) - _HEADER_SIZE:
+                log.warning("[Client %d] Unexpected CONNECT_ACK payload size: %d", self.client_id, payload_size)
                 return False
             
-            # Parse payload: PlayerId (1 byte) + Status (1 byte) + Reserved (2 bytes)
-            player_id, status, _, _ = struct.unpack('<BBBB', payload)
+            # Receive payload (4 bytes) right after the header
+            await self._recv_exact(payload_size, _HEADER_SIZE, timeout=self.read_timeout)
             
-            status_names = {
-                0: "OK",
-                1: "ServerFull",
-                2: "BadUsername",
-                3: "InGame"
-            }
+            # Parse payload: PlayerId (1 byte) + Status (1 byte) + Reserved (2 bytes)
+            player_id, status, _, _ = _ACK_PAYLOAD.unpack_from(self._rbuf, _HEADER_SIZE)
             
-            status_str = status_names.get(status, f"Unknown({status})")
-            print(f"[Client {self.client_id}] Received CONNECT_ACK: PlayerId={player_id}, Status={status_str}")
+            status_str = _STATUS_NAMES.get(status, f"Unknown({status})")
+            log.info("[Client %d] Received CONNECT_ACK: PlayerId=%d, Status=%s", self.client_id, player_id, status_str)
             
             if status == 0:  # OK
                 self.player_id = player_id
                 return True
             else:
-                print(f"[Client {self.client_id}] Connection rejected: {status_str}")
-                print(f"[Client {self.client_id}] Staying connected (can retry later)")
+                log.warning("[Client %d] Connection rejected: %s", self.client_id, status_str)
+                log.info("[Client %d] Staying connected (can retry later)", self.client_id)
                 return False
                 
         except Exception as e:
-            print(f"[Client {self.client_id}] Error receiving CONNECT_ACK: {e}")
+            log.warning("[Client %d] Error receiving CONNECT_ACK: %s", self.client_id, e)
             return False
-    def send_ready_status(self, is_ready: bool = True):
+    
+    async def send_ready_status(self, is_ready: bool = True):
         """Send READY_STATUS packet (opcode 0x07)."""
         if not self.sock or self.player_id is None:
-            print(f"[Client {self.client_id}] Not connected, cannot send READY_STATUS")
+            log.warning("[Client %d] Not connected, cannot send READY_STATUS", self.client_id)
             return
         
-        op_code = PacketType.READY_STATUS
-        payload_size = 4
-        packet_index = 0
-        tick_id = 0  # TCP packets use TickId = 0
-        packet_count = 1
-        reserved = (0, 0, 0)
-        
-        # Header (12 bytes) - Little Endian
-        header = struct.pack(
-            '<BHBIBBBB',
-            op_code,
-            payload_size,
-            packet_index,
-            tick_id,
-            packet_count,
-            reserved[0],
-            reserved[1],
-            reserved[2]
-        )
-        
-        # Payload: IsReady (1 byte) + Reserved (3 bytes)
-        payload = struct.pack('<BBBB', 1 if is_ready else 0, 0, 0, 0)
-        
-        packet = header + payload
-        
-        print(f"[Client {self.client_id}] Sending READY_STATUS: {'Ready' if is_ready else 'Not Ready'}")
-        self.sock.sendall(packet)
+        log.debug("[Client %d] Sending READY_STATUS: %s", self.client_id, 'Ready' if is_ready else 'Not Ready')
+        packet = self._READY_PACKET_READY if is_ready else self._READY_PACKET_NOT_READY
+        await asyncio.get_running_loop().sock_sendall(self.sock, packet)
     
     def disconnect(self):
         """Close the connection."""
         if self.sock:
-            print(f"[Client {self.client_id}] Disconnecting...")
+            log.debug("[Client %d] Disconnecting...", self.client_id)
             self.sock.close()
             self.sock = None
     
-    def keep_alive(self):
-        """Keep the connection alive (blocking)."""
+    async def watch(self):
+        """Read server packets until the server closes the connection."""
         if not self.sock:
             return
         
         try:
-            print(f"[Client {self.client_id}] Staying connected (press Ctrl+C to stop all clients)")
-            # Just wait for server messages or connection close
             while True:
-                time.sleep(1)
-        except KeyboardInterrupt:
-            pass
+                # Block until the server sends something (no timeout, no polling)
+                await self._recv_exact(_HEADER_SIZE)
+                op_code, payload_size = _HEADER.unpack_from(self._rbuf, 0)[:2]
+                
+                # Payload content is not used, just consume it
+                while payload_size:
+                    chunk = min(payload_size, len(self._rbuf))
+                    await self._recv_exact(chunk)
+                    payload_size -= chunk
+                
+                if log.isEnabledFor(logging.DEBUG):
+                    name = _PACKET_NAMES.get(op_code, f"0x{op_code:02x}")
+                    log.debug("[Client %d] Received %s from server", self.client_id, name)
+        except (ConnectionError, OSError) as e:
+            log.info("[Client %d] Server closed the connection: %s", self.client_id, e)
+            self.disconnect()
+
+
+async def spawn_clients(clients: list, send_ready: bool, use_delay: bool):
+    """Run the handshake of every client, then keep them connected."""
+    if use_delay:
+        for i, client in enumerate(clients):
+            # Wait 1 second before spawning next client (except for the first one)
+            if i > 0:
+                await asyncio.sleep(1)
+            await client.run(send_ready)
+    else:
+        # All handshakes run concurrently on the event loop
+        await asyncio.gather(*(client.run(send_ready) for client in clients))
+    
+    # Clients whose TCP connection succeeded are kept (regardless of auth status)
+    connected = [client for client in clients if client.sock]
+    
+    print()
+    print("=" * 60)
+    print(f"Successfully connected {len(connected)}/{len(clients)} client(s)")
+    print("Clients will stay connected until you press Ctrl+C")
+    print("=" * 60)
+    print()
+    
+    # Keep all clients alive, reacting to server packets, until Ctrl+C or
+    # until the server has closed every connection
+    await asyncio.gather(*(client.watch() for client in connected))
+    if connected:
+        print("Server closed all connections")
 
 
 def main():
     """Main entry point for the dummy client launcher."""
     # Parse command line arguments
-    host = sys.argv[1] if len(sys.argv) > 1 else "localhost"
-    port = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+    parser = argparse.ArgumentParser(description="Spawn dummy R-Type clients for testing")
+    parser.add_argument("host", nargs="?", default="localhost",
+                        help="Server hostname/IP (default: localhost)")
+    parser.add_argument("port", nargs="?", type=int, default=50000,
+                        help="Server TCP port (default: 50000)")
+    parser.add_argument("--connect-timeout", type=float, default=DEFAULT_CONNECT_TIMEOUT,
+                        help=f"TCP connect timeout in seconds (default: {DEFAULT_CONNECT_TIMEOUT})")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_READ_TIMEOUT,
+                        help=f"Timeout waiting for server replies in seconds (default: {DEFAULT_READ_TIMEOUT})")
+    parser.add_argument("-v", "--verbose", action="count", default=0,
+                        help="Show client progress (-v) and every packet (-vv)")
+    args = parser.parse_args()
+    host, port = args.host, args.port
+    
+    # Only this script's logger follows -v/-vv, libraries stay at WARNING
+    log_levels = (logging.WARNING, logging.INFO, logging.DEBUG)
+    logging.basicConfig(format="%(message)s", level=logging.WARNING)
+    log.setLevel(log_levels[min(args.verbose, len(log_levels) - 1)])
     
     print("=" * 60)
     print("R-Type Dummy Client Launcher")
@@ -245,41 +343,12 @@ def main():
     print(f"Delay between clients: {'1 second' if use_delay else 'None (immediate)'}")
     print()
     
-    clients = []
+    clients = [DummyClient(i, host, port, args.connect_timeout, args.timeout)
+               for i in range(1, num_clients + 1)]
     
     try:
-        # Spawn clients with 1 second delay
-        for i in range(1, num_clients + 1):
-            client = DummyClient(i, host, port)
-            
-            success = client.connect()
-            
-            # Add to clients list if TCP connection succeeded (regardless of auth status)
-            if client.sock:
-                clients.append(client)
-                
-                # Send ready status only if authenticated and requested
-                if success and send_ready:
-                    time.sleep(0.5)  # Small delay before sending ready
-                    client.send_ready_status(is_ready=True)
-            else:
-                print(f"[Client {i}] Failed to establish TCP connection, skipping...")
-            
-            # Wait 1 second before spawning next client (except for the last one)
-            if use_delay and i < num_clients:
-                time.sleep(1)
-        
-        print()
-        print("=" * 60)
-        print(f"Successfully connected {len(clients)}/{num_clients} client(s)")
-        print("Clients will stay connected until you press Ctrl+C")
-        print("=" * 60)
-        print()
-        
-        # Keep all clients alive
-        if clients:
-            clients[0].keep_alive()  # Use first client to wait for Ctrl+C
-        
+        # Ctrl+C cancels the running clients and surfaces as KeyboardInterrupt
+        asyncio.run(spawn_clients(clients, send_ready, use_delay))
     except KeyboardInterrupt:
         print("\n\nShutting down all clients...")
     finally:
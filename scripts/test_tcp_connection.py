@@ -12,6 +12,7 @@ This script tests the TCP handshake implementation including:
 
 Usage:
     python3 scripts/test_tcp_connection.py [--host HOST] [--port PORT] [--test TEST]
+                                           [--reply-window SECONDS]
 
 Examples:
     # Run all tests
@@ -22,14 +23,22 @@ Examples:
 
     # Run edge case tests
     python3 scripts/test_tcp_connection.py --test edge
+
+    # Remote server: wait longer for replies that should not come
+    python3 scripts/test_tcp_connection.py --host HOST --reply-window 1.0
 """
 
 import argparse
+import asyncio
+import contextlib
+import functools
+import select
 import socket
 import struct
 import sys
-import time
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple, Optional
 
 
@@ -44,10 +53,112 @@ class Color:
     CYAN = '\033[96m'
 
 
+# No escape codes when the output is piped to a file or another program
+if not sys.stdout.isatty():
+    Color.RESET = Color.GREEN = Color.RED = Color.YELLOW = ''
+    Color.BLUE = Color.BOLD = Color.CYAN = ''
+
+# Status markers and banners, built once
+_OK = f"{Color.GREEN}✓{Color.RESET}"
+_FAIL = f"{Color.RED}✗{Color.RESET}"
+_WARN = f"{Color.YELLOW}!{Color.RESET}"
+_BAR60 = "=" * 60
+_BAR70 = "=" * 70
+
+
+# Output of the tests run through _run_captured on the current thread
+_captured = threading.local()
+
+# Server accepts at most 4 players: at most 3 single-client tests run at once,
+# keeping one slot free while the server reaps the previous clients
+_PARALLEL_WORKERS = 3
+
+
+# Socket tuning: explicit 64 KiB kernel buffers, so tests reading longer
+# server streams are not limited by small buffers
+_SOCKET_BUFFER_SIZE = 64 * 1024
+
+# Default time to wait for a reply that is expected not to come, in seconds;
+# sized for a local server (see --reply-window)
+_NO_REPLY_WINDOW = 0.2
+
+# SO_LINGER value (l_onoff=1, l_linger=0): close() sends an RST right away
+_LINGER_RESET = struct.pack('ii', 1, 0)
+
+# Packet header without the 3 reserved bytes (little-endian): op_code(u8) +
+# payload_size(u16) + packet_index(u8) + tick_id(u32) + packet_count(u8)
+_HEADER = struct.Struct('<BHBIB')
+_RESERVED3 = b'\x00\x00\x00'
+_HEADER_SIZE = _HEADER.size + len(_RESERVED3)
+
+# CONNECT_ACK fields actually read: op_code(u8) + payload_size(u16) from the
+# header, player_id(u8) + status(u8) from the payload
+_ACK_HDR = struct.Struct('<BH')
+_ACK_PAYLOAD = struct.Struct('<BB')
+
+# CONNECT_ACK status codes
+_STATUS_NAMES = {0: 'OK', 1: 'ServerFull', 2: 'BadUsername', 3: 'InGame'}
+
+# TCP packet headers are constant per packet type: packet_index=0, tick_id=0,
+# packet_count=1, reserved=0
+_CONNECT_REQ_HEADER = _HEADER.pack(0x01, 32, 0, 0, 1) + _RESERVED3
+_READY_STATUS_HEADER = _HEADER.pack(0x07, 4, 0, 0, 1) + _RESERVED3
+
+# READY_STATUS payload is only the ready flag + 3 reserved bytes, so both
+# possible packets are built once, indexed by the flag
+_READY_STATUS_PACKETS = (
+    _READY_STATUS_HEADER + b'\x00\x00\x00\x00',
+    _READY_STATUS_HEADER + b'\x01\x00\x00\x00',
+)
+
+# Deliberately broken packets for the error handling tests, username 'Test'
+_MALFORMED_CONNECT_REQ = (
+    _HEADER.pack(
+        0x01,  # op_code
+        50,    # wrong payload_size (should be 32)
+        0, 0, 1
+    ) + _RESERVED3 + b'Test'.ljust(32, b'\x00')
+)
+_INVALID_OPCODE_PACKET = (
+    _HEADER.pack(
+        0xFF,  # invalid op_code
+        32, 0, 0, 1
+    ) + _RESERVED3 + b'Test'.ljust(32, b'\x00')
+)
+
+
+def _truncate_utf8(text: str, max_bytes: int = 31) -> bytes:
+    """
+    Encode text as UTF-8, keeping at most max_bytes without splitting a character.
+
+    Every character takes at least one byte, so only the first max_bytes
+    characters are encoded: very long usernames cost no more than short ones.
+
+    Args:
+        text: String to encode
+        max_bytes: Maximum encoded length
+
+    Returns:
+        Encoded (possibly truncated) bytes
+    """
+    encoded = text[:max_bytes].encode('utf-8', errors='replace')
+    if len(encoded) <= max_bytes:
+        return encoded
+
+    # Back off while the first dropped byte continues a multi-byte character
+    end = max_bytes
+    while end and encoded[end] & 0xC0 == 0x80:
+        end -= 1
+    return encoded[:end]
+
+
+@functools.lru_cache(maxsize=256)
 def build_connect_req(username: str) -> bytes:
     """
     Build a CONNECT_REQ packet (OpCode 0x01).
 
+    Packets are memoized per username since many tests reuse the same names.
+
     Packet format (44 bytes total):
     - Header (12 bytes): op_code(u8) + payload_size(u16) + packet_index(u8) +
                          tick_id(u32) + packet_count(u8) + reserved(3)
@@ -59,21 +170,8 @@ def build_connect_req(username: str) -> bytes:
     Returns:
         Complete packet as bytes
     """
-    # Truncate and pad username to 32 bytes
-    username_bytes = username.encode('utf-8', errors='replace')[:31]  # Max 31 chars + null
-    username_bytes = username_bytes.ljust(32, b'\x00')
-
-    # Pack header (little-endian, 12 bytes)
-    header = struct.pack(
-        '<BHBIB',
-        0x01,  # op_code: CONNECT_REQ (1 byte)
-        32,    # payload_size: 32 bytes (2 bytes)
-        0,     # packet_index: 0 (1 byte)
-        0,     # tick_id: 0 (4 bytes)
-        1      # packet_count: 1 (1 byte)
-    ) + b'\x00\x00\x00'  # reserved: 3 bytes
-
-    return header + username_bytes
+    # Truncate (max 31 bytes + null) and pad username to 32 bytes
+    return _CONNECT_REQ_HEADER + _truncate_utf8(username, 31).ljust(32, b'\x00')
 
 
 def build_ready_status(is_ready: bool) -> bytes:
@@ -91,20 +189,7 @@ def build_ready_status(is_ready: bool) -> bytes:
     Returns:
         Complete packet as bytes
     """
-    # Pack header (little-endian, 12 bytes)
-    header = struct.pack(
-        '<BHBIB',
-        0x07,  # op_code: READY_STATUS (1 byte)
-        4,     # payload_size: 4 bytes (2 bytes)
-        0,     # packet_index: 0 (1 byte)
-        0,     # tick_id: 0 (4 bytes)
-        1      # packet_count: 1 (1 byte)
-    ) + b'\x00\x00\x00'  # reserved: 3 bytes
-
-    # Pack payload: ready flag + 3 reserved bytes
-    payload = struct.pack('<B', 1 if is_ready else 0) + b'\x00\x00\x00'
-
-    return header + payload
+    return _READY_STATUS_PACKETS[bool(is_ready)]
 
 
 def parse_connect_ack(response: bytes) -> tuple[int, int, int]:
@@ -124,11 +209,9 @@ def parse_connect_ack(response: bytes) -> tuple[int, int, int]:
     if len(response) < 16:
         raise ValueError(f"Response too short: {len(response)} bytes")
 
-    # Parse header
-    op_code, payload_size = struct.unpack('<BH', response[0:3])
-
-    # Parse payload
-    player_id, status = struct.unpack('<BB', response[12:14])
+    # Parse header and payload in place (no slicing)
+    op_code, payload_size = _ACK_HDR.unpack_from(response, 0)
+    player_id, status = _ACK_PAYLOAD.unpack_from(response, _HEADER_SIZE)
 
     return op_code, player_id, status
 
@@ -157,6 +240,59 @@ def parse_game_start(response: bytes) -> int:
     return op_code
 
 
+def _make_sock(timeout: float) -> socket.socket:
+    """
+    Create a TCP socket set up for the small request/response exchanges of the tests.
+
+    Nagle is disabled so small packets are sent immediately instead of
+    waiting for the ACK of the previous segment.
+
+    Args:
+        timeout: Socket timeout in seconds
+
+    Returns:
+        Unconnected socket
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _SOCKET_BUFFER_SIZE)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, _SOCKET_BUFFER_SIZE)
+    except OSError:
+        pass  # Keep the OS defaults where they cannot be changed
+    sock.settimeout(timeout)
+    return sock
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytearray:
+    """
+    Receive exactly n bytes, looping over short reads.
+
+    Data is received in place into a buffer of the exact size, instead of
+    allocating an oversized bytes object per recv.
+
+    Args:
+        sock: Connected socket
+        n: Number of bytes to receive
+
+    Returns:
+        Buffer holding the n bytes
+
+    Raises:
+        ConnectionError: If the server closes the connection first
+    """
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        received = sock.recv_into(view[got:])
+        if not received:
+            raise ConnectionError(
+                f"Connection closed by server after {got}/{n} bytes")
+        got += received
+    return buf
+
+
 def send_connect_req(host: str, port: int, username: str,
                      timeout: float = 3.0) -> tuple[socket.socket | None, int, int]:
     """
@@ -168,22 +304,47 @@ def send_connect_req(host: str, port: int, username: str,
         username: Player username
         timeout: Socket timeout in seconds
 
+    Returns:
+        Tuple of (socket, player_id, status). Socket is None on failure.
+    """
+    return send_connect_req_raw(host, port, build_connect_req(username),
+                                timeout)
+
+
+def send_connect_req_raw(host: str, port: int, packet: bytes,
+                         timeout: float = 3.0) -> tuple[socket.socket | None, int, int]:
+    """
+    Same as send_connect_req, with an already built CONNECT_REQ packet.
+
+    Lets loops reusing the same username build the packet only once.
+
+    Args:
+        host: Server hostname/IP
+        port: Server TCP port
+        packet: CONNECT_REQ packet from build_connect_req
+        timeout: Socket timeout in seconds
+
     Returns:
         Tuple of (socket, player_id, status). Socket is None on failure.
     """
     sock = None
     try:
         # Connect to server
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(timeout)
+        sock = _make_sock(timeout)
         sock.connect((host, port))
+        if hasattr(socket, 'TCP_QUICKACK'):  # Linux only: no delayed ACKs
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+
+        # Send CONNECT_REQ, corked so the whole packet leaves as one segment
+        if hasattr(socket, 'TCP_CORK'):  # Linux only
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_CORK, 1)
+            sock.send(packet)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_CORK, 0)
+        else:
+            sock.send(packet)
 
-        # Send CONNECT_REQ
-        packet = build_connect_req(username)
-        sock.send(packet)
-
-        # Receive CONNECT_ACK
-        response = sock.recv(1024)
+        # Receive CONNECT_ACK (16 bytes)
+        response = _recv_exact(sock, 16)
         op_code, player_id, status = parse_connect_ack(response)
 
         if op_code != 0x02:
@@ -197,605 +358,746 @@ def send_connect_req(host: str, port: int, username: str,
         raise e
 
 
-def status_name(status: int) -> str:
-    """Get human-readable status name."""
-    return {
-        0: 'OK',
-        1: 'ServerFull',
-        2: 'BadUsername',
-        3: 'InGame'
-    }.get(status, f'Unknown({status})')
+def _readable_soon(sock: socket.socket, window: float) -> bool:
+    """
+    Check whether the server replied (or closed) within a short window.
 
+    Used by the tests where no reply is expected, so they do not block for
+    a full timeout. A reply arriving after the window is missed, so the
+    window must exceed the round trip to the server.
 
-def test_basic_connection(host: str, port: int):
-    """Test basic successful connection."""
-    print(f"\n{Color.BOLD}Test 1: Basic Connection{Color.RESET}")
-    print("=" * 60)
+    Args:
+        sock: Connected socket
+        window: Time to wait in seconds
+
+    Returns:
+        True if sock has data or EOF to read
+    """
+    readable, _, _ = select.select([sock], [], [], window)
+    return bool(readable)
+
+
+def _abort(sock: socket.socket) -> None:
+    """
+    Close a socket with a TCP reset instead of the FIN handshake.
+
+    With SO_LINGER {on, 0 s} the server sees the disconnect as soon as the
+    RST arrives, so a follow-up connection reusing the same username does
+    not need to wait for the server to notice the close.
 
+    Args:
+        sock: Socket to close
+    """
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_RESET)
+    sock.close()
+
+
+def _try_connect_req(host: str, port: int, username: str,
+                     timeout: float = 3.0) -> tuple[socket.socket | None, int | None, int | None, Exception | None]:
+    """
+    Same as send_connect_req, but returns the error instead of raising it.
+
+    Meant for thread pools, where one failing handshake must not hide the
+    results of the others.
+
+    Returns:
+        Tuple of (socket, player_id, status, error). error is None on success.
+    """
     try:
-        sock, player_id, status = send_connect_req(host, port, "TestPlayer")
-        status_str = status_name(status)
+        return (*send_connect_req(host, port, username, timeout), None)
+    except Exception as e:
+        return None, None, None, e
 
-        if status == 0:
-            print(f"{Color.GREEN}✓{Color.RESET} Connected successfully")
-            print(f"  Player ID: {player_id}")
-            print(f"  Status: {status_str}")
-            sock.close()
-            return True
+
+def connect_many(host: str, port: int, usernames: list[str],
+                 timeout: float = 3.0) -> list[tuple]:
+    """
+    Connect one client per username in parallel.
+
+    Handshakes are independent, so running them concurrently overlaps their
+    round trips instead of paying for them one after the other.
+
+    Returns:
+        List of _try_connect_req results, in the same order as usernames
+    """
+    with ThreadPoolExecutor(max_workers=max(len(usernames), 1)) as executor:
+        return list(executor.map(
+            lambda username: _try_connect_req(host, port, username, timeout),
+            usernames))
+
+
+async def _async_connect(host: str, port: int, packet: bytes,
+                         timeout: float = 3.0) -> tuple[int, int, asyncio.StreamWriter]:
+    """
+    Asyncio version of send_connect_req_raw.
+
+    Args:
+        host: Server hostname/IP
+        port: Server TCP port
+        packet: CONNECT_REQ packet from build_connect_req
+        timeout: Timeout in seconds for the whole handshake
+
+    Returns:
+        Tuple of (player_id, status, writer). The caller closes the writer.
+    """
+    async def handshake():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(packet)
+            await writer.drain()
+            op_code, player_id, status = parse_connect_ack(
+                await reader.readexactly(16))
+        except BaseException:
+            writer.close()
+            raise
+
+        if op_code != 0x02:
+            writer.close()
+            raise ValueError(f"Expected CONNECT_ACK (0x02), got 0x{op_code:02x}")
+
+        return player_id, status, writer
+
+    return await asyncio.wait_for(handshake(), timeout)
+
+
+def _write_output(out: list[str]) -> None:
+    """Write buffered output lines in a single call."""
+    sys.stdout.write('\n'.join(out) + '\n')
+    sys.stdout.flush()
+
+
+@contextlib.contextmanager
+def _buffered_output():
+    """
+    Collect a test's output lines and write them in a single call.
+
+    Yields the list the test appends its lines to. The lines are written
+    when the block exits, even if the test returns early or raises. Under
+    _run_captured they are handed back to the caller instead.
+    """
+    out = []
+    try:
+        yield out
+    finally:
+        captured = getattr(_captured, 'lines', None)
+        if captured is not None:
+            captured.extend(out)
         else:
-            print(f"{Color.RED}✗{Color.RESET} Connection rejected")
-            print(f"  Status: {status_str}")
-            return False
+            _write_output(out)
 
-    except Exception as e:
-        print(f"{Color.RED}✗{Color.RESET} Error: {e}")
-        return False
+
+def _run_captured(test, *args):
+    """
+    Run a test, keeping its output instead of writing it.
+
+    Meant for thread pools: the caller writes the outputs in a fixed order
+    once the tests are done, whatever order they finished in.
+
+    Returns:
+        Tuple of (test result, output lines)
+    """
+    _captured.lines = []
+    try:
+        return test(*args), _captured.lines
+    finally:
+        del _captured.lines
+
+
+class ServerFixture:
+    """
+    Context manager keeping clients connected for the duration of a block.
+
+    Tests needing the same pre-filled server share one set of connections
+    instead of each opening and closing its own. Errors are not raised: they
+    are left in results for the tests to report.
+
+    Attributes:
+        usernames: Username of each client
+        results: _try_connect_req result of each client, in usernames order
+        sockets: Sockets of the clients accepted by the server
+    """
+
+    def __init__(self, host: str, port: int, num_clients: int = 4):
+        self.host = host
+        self.port = port
+        self.usernames = [f"Player{i}" for i in range(1, num_clients + 1)]
+        self.results = []
+        self.sockets = []
+
+    def __enter__(self) -> 'ServerFixture':
+        self.results = connect_many(self.host, self.port, self.usernames)
+        self.sockets = [sock for sock, _, status, _ in self.results
+                        if status == 0 and sock]
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        for sock in self.sockets:
+            sock.close()
+        self.sockets = []
 
 
-def test_multiple_clients(host: str, port: int, num_clients: int = 4):
-    """Test connecting multiple clients."""
-    print(f"\n{Color.BOLD}Test 2: Multiple Clients (max {num_clients}){Color.RESET}")
-    print("=" * 60)
+def status_name(status: int) -> str:
+    """Get human-readable status name."""
+    return _STATUS_NAMES.get(status, f'Unknown({status})')
 
-    sockets = []
-    success_count = 0
 
-    for i in range(1, num_clients + 1):
-        username = f"Player{i}"
+def test_basic_connection(host: str, port: int):
+    """Test basic successful connection."""
+    with _buffered_output() as out:
+        out.append(f"\n{Color.BOLD}Test 1: Basic Connection{Color.RESET}")
+        out.append(_BAR60)
+
         try:
-            sock, player_id, status = send_connect_req(host, port, username)
+            sock, player_id, status = send_connect_req(host, port, "TestPlayer")
             status_str = status_name(status)
 
             if status == 0:
-                print(f"{Color.GREEN}✓{Color.RESET} {username:12s} → ID={player_id}, {status_str}")
-                sockets.append(sock)
-                success_count += 1
+                out.append(f"{_OK} Connected successfully")
+                out.append(f"  Player ID: {player_id}")
+                out.append(f"  Status: {status_str}")
+                sock.close()
+                return True
             else:
-                print(f"{Color.YELLOW}!{Color.RESET} {username:12s} → {status_str}")
+                out.append(f"{_FAIL} Connection rejected")
+                out.append(f"  Status: {status_str}")
+                return False
 
         except Exception as e:
-            print(f"{Color.RED}✗{Color.RESET} {username:12s} → Error: {e}")
+            out.append(f"{_FAIL} Error: {e}")
+            return False
 
-        time.sleep(0.1)
 
-    print(f"\n  Connected: {success_count}/{num_clients}")
+def test_multiple_clients(filled: ServerFixture):
+    """Test connecting multiple clients (the ones held by filled)."""
+    with _buffered_output() as out:
+        num_clients = len(filled.usernames)
+        out.append(f"\n{Color.BOLD}Test 2: Multiple Clients (max {num_clients}){Color.RESET}")
+        out.append(_BAR60)
 
-    # Cleanup
-    for sock in sockets:
-        sock.close()
+        success_count = 0
 
-    return success_count == num_clients
+        for username, (sock, player_id, status, error) in zip(
+                filled.usernames, filled.results):
+            if error is not None:
+                out.append(f"{_FAIL} {username:12s} → Error: {error}")
+                continue
 
+            status_str = status_name(status)
 
-def test_server_full(host: str, port: int):
-    """Test server full rejection (5th client)."""
-    print(f"\n{Color.BOLD}Test 3: Server Full{Color.RESET}")
-    print("=" * 60)
+            if status == 0:
+                out.append(f"{_OK} {username:12s} → ID={player_id}, {status_str}")
+                success_count += 1
+            else:
+                out.append(f"{_WARN} {username:12s} → {status_str}")
 
-    # Connect 4 clients
-    sockets = []
-    for i in range(1, 5):
-        try:
-            sock, _, status = send_connect_req(host, port, f"Player{i}")
-            if status == 0 and sock:
-                sockets.append(sock)
-        except:
-            pass # Ignore errors here
-        time.sleep(0.1)
+        out.append(f"\n  Connected: {success_count}/{num_clients}")
 
-    print(f"Pre-filled server with {len(sockets)} clients")
+        return success_count == num_clients
 
-    # Try 5th client
-    try:
-        sock, player_id, status = send_connect_req(host, port, "Player5")
-        status_str = status_name(status)
 
-        if status == 1:  # ServerFull
-            print(f"{Color.GREEN}✓{Color.RESET} Correctly rejected 5th client")
-            print(f"  Status: {status_str}")
-            result = True
-        else:
-            print(f"{Color.RED}✗{Color.RESET} Expected ServerFull, got {status_str}")
-            result = False
-            if sock:
-                sock.close()
+def test_server_full(host: str, port: int, filled: ServerFixture):
+    """Test server full rejection (5th client, server pre-filled by filled)."""
+    with _buffered_output() as out:
+        out.append(f"\n{Color.BOLD}Test 3: Server Full{Color.RESET}")
+        out.append(_BAR60)
 
-    except Exception as e:
-        print(f"{Color.RED}✗{Color.RESET} Error: {e}")
-        result = False
+        out.append(f"Pre-filled server with {len(filled.sockets)} clients")
 
-    # Cleanup
-    for sock in sockets:
-        sock.close()
+        # Try 5th client
+        try:
+            sock, player_id, status = send_connect_req(host, port, "Player5")
+            status_str = status_name(status)
 
-    return result
+            if status == 1:  # ServerFull
+                out.append(f"{_OK} Correctly rejected 5th client")
+                out.append(f"  Status: {status_str}")
+                result = True
+            else:
+                out.append(f"{_FAIL} Expected ServerFull, got {status_str}")
+                result = False
+                if sock:
+                    sock.close()
+
+        except Exception as e:
+            out.append(f"{_FAIL} Error: {e}")
+            result = False
+
+        return result
 
 
 def test_duplicate_username(host: str, port: int):
     """Test duplicate username rejection."""
-    print(f"\n{Color.BOLD}Test 4: Duplicate Username{Color.RESET}")
-    print("=" * 60)
+    with _buffered_output() as out:
+        out.append(f"\n{Color.BOLD}Test 4: Duplicate Username{Color.RESET}")
+        out.append(_BAR60)
 
-    # Connect first client
-    try:
-        sock1, player_id1, status1 = send_connect_req(host, port, "TestPlayer")
-        if status1 != 0:
-            print(f"{Color.YELLOW}!{Color.RESET} First connection failed: {status_name(status1)}")
-            return False
+        # Connect first client
+        try:
+            sock1, player_id1, status1 = send_connect_req(host, port, "TestPlayer")
+            if status1 != 0:
+                out.append(f"{_WARN} First connection failed: {status_name(status1)}")
+                return False
 
-        print(f"{Color.GREEN}✓{Color.RESET} First 'TestPlayer' connected (ID={player_id1})")
+            out.append(f"{_OK} First 'TestPlayer' connected (ID={player_id1})")
 
-        # Try duplicate
-        time.sleep(0.1)
-        _, player_id2, status2 = send_connect_req(host, port, "TestPlayer")
-        status_str = status_name(status2)
+            # Try duplicate
+            _, player_id2, status2 = send_connect_req(host, port, "TestPlayer")
+            status_str = status_name(status2)
 
-        if status2 == 2:  # BadUsername
-            print(f"{Color.GREEN}✓{Color.RESET} Correctly rejected duplicate username")
-            print(f"  Status: {status_str}")
-            result = True
-        else:
-            print(f"{Color.RED}✗{Color.RESET} Expected BadUsername, got {status_str}")
-            result = False
+            if status2 == 2:  # BadUsername
+                out.append(f"{_OK} Correctly rejected duplicate username")
+                out.append(f"  Status: {status_str}")
+                result = True
+            else:
+                out.append(f"{_FAIL} Expected BadUsername, got {status_str}")
+                result = False
 
-        sock1.close()
-        return result
+            sock1.close()
+            return result
 
-    except Exception as e:
-        print(f"{Color.RED}✗{Color.RESET} Error: {e}")
-        return False
+        except Exception as e:
+            out.append(f"{_FAIL} Error: {e}")
+            return False
 
 
 def test_empty_username(host: str, port: int):
     """Test empty username rejection."""
-    print(f"\n{Color.BOLD}Test 5: Empty Username{Color.RESET}")
-    print("=" * 60)
+    with _buffered_output() as out:
+        out.append(f"\n{Color.BOLD}Test 5: Empty Username{Color.RESET}")
+        out.append(_BAR60)
 
-    try:
-        _, player_id, status = send_connect_req(host, port, "")
-        status_str = status_name(status)
+        try:
+            _, player_id, status = send_connect_req(host, port, "")
+            status_str = status_name(status)
 
-        if status == 2:  # BadUsername
-            print(f"{Color.GREEN}✓{Color.RESET} Correctly rejected empty username")
-            print(f"  Status: {status_str}")
-            return True
-        else:
-            print(f"{Color.RED}✗{Color.RESET} Expected BadUsername, got {status_str}")
-            return False
+            if status == 2:  # BadUsername
+                out.append(f"{_OK} Correctly rejected empty username")
+                out.append(f"  Status: {status_str}")
+                return True
+            else:
+                out.append(f"{_FAIL} Expected BadUsername, got {status_str}")
+                return False
 
-    except Exception as e:
-        print(f"{Color.RED}✗{Color.RESET} Error: {e}")
-        return False
+        except Exception as e:
+            out.append(f"{_FAIL} Error: {e}")
+            return False
 
 
 # ===========================================================================
 # EDGE CASE TESTS
 # ===========================================================================
 
+
 def test_long_username(host: str, port: int) -> bool:
     """Test username longer than 31 characters."""
-    print(f"\n{Color.BOLD}Test 6: Long Username (>31 chars){Color.RESET}")
-    print("=" * 60)
+    with _buffered_output() as out:
+        out.append(f"\n{Color.BOLD}Test 6: Long Username (>31 chars){Color.RESET}")
+        out.append(_BAR60)
 
-    # 50 characters - should be truncated to 31
-    long_username = "A" * 50
+        # 50 characters - should be truncated to 31
+        long_username = "A" * 50
 
-    try:
-        sock, player_id, status = send_connect_req(host, port, long_username)
+        try:
+            sock, player_id, status = send_connect_req(host, port, long_username)
 
-        if status == 0:  # OK
-            print(f"{Color.GREEN}✓{Color.RESET} Server accepted (truncated username)")
-            print(f"  Player ID: {player_id}")
-            if sock:
-                sock.close()
-            return True
-        else:
-            print(f"{Color.YELLOW}!{Color.RESET} Server rejected: {status_name(status)}")
-            return False
+            if status == 0:  # OK
+                out.append(f"{_OK} Server accepted (truncated username)")
+                out.append(f"  Player ID: {player_id}")
+                if sock:
+                    sock.close()
+                return True
+            else:
+                out.append(f"{_WARN} Server rejected: {status_name(status)}")
+                return False
 
-    except Exception as e:
-        print(f"{Color.RED}✗{Color.RESET} Error: {e}")
-        return False
+        except Exception as e:
+            out.append(f"{_FAIL} Error: {e}")
+            return False
 
 
 def test_special_characters(host: str, port: int) -> bool:
     """Test username with special characters."""
-    print(f"\n{Color.BOLD}Test 7: Special Characters{Color.RESET}")
-    print("=" * 60)
+    with _buffered_output() as out:
+        out.append(f"\n{Color.BOLD}Test 7: Special Characters{Color.RESET}")
+        out.append(_BAR60)
 
-    special_username = "User!@#$%^&*()_+-="
+        special_username = "User!@#$%^&*()_+-="
 
-    try:
-        sock, player_id, status = send_connect_req(host, port, special_username)
+        try:
+            sock, player_id, status = send_connect_req(host, port, special_username)
 
-        if status == 0:
-            print(f"{Color.GREEN}✓{Color.RESET} Server accepted special chars")
-            print(f"  Player ID: {player_id}")
-            if sock:
-                sock.close()
-            return True
-        else:
-            print(f"{Color.YELLOW}!{Color.RESET} Server rejected: {status_name(status)}")
-            return True  # Not necessarily a failure
+            if status == 0:
+                out.append(f"{_OK} Server accepted special chars")
+                out.append(f"  Player ID: {player_id}")
+                if sock:
+                    sock.close()
+                return True
+            else:
+                out.append(f"{_WARN} Server rejected: {status_name(status)}")
+                return True  # Not necessarily a failure
 
-    except Exception as e:
-        print(f"{Color.RED}✗{Color.RESET} Error: {e}")
-        return False
+        except Exception as e:
+            out.append(f"{_FAIL} Error: {e}")
+            return False
 
 
 def test_emoji_username(host: str, port: int) -> bool:
     """Test username with emoji characters."""
-    print(f"\n{Color.BOLD}Test 8: Emoji Username{Color.RESET}")
-    print("=" * 60)
+    with _buffered_output() as out:
+        out.append(f"\n{Color.BOLD}Test 8: Emoji Username{Color.RESET}")
+        out.append(_BAR60)
 
-    emoji_username = "Player🎮😀"
+        emoji_username = "Player🎮😀"
 
-    try:
-        sock, player_id, status = send_connect_req(host, port, emoji_username)
+        try:
+            sock, player_id, status = send_connect_req(host, port, emoji_username)
 
-        print(f"{Color.GREEN}✓{Color.RESET} Server handled emoji username")
-        print(f"  Status: {status_name(status)}")
-        if sock:
-            sock.close()
-        return True
+            out.append(f"{_OK} Server handled emoji username")
+            out.append(f"  Status: {status_name(status)}")
+            if sock:
+                sock.close()
+            return True
 
-    except Exception as e:
-        print(f"{Color.YELLOW}!{Color.RESET} Exception (may be expected): {e}")
-        return True  # Emoji handling varies
+        except Exception as e:
+            out.append(f"{_WARN} Exception (may be expected): {e}")
+            return True  # Emoji handling varies
 
 
 def test_whitespace_username(host: str, port: int) -> bool:
     """Test username with only whitespace (should be trimmed to empty)."""
-    print(f"\n{Color.BOLD}Test 9: Whitespace-Only Username{Color.RESET}")
-    print("=" * 60)
+    with _buffered_output() as out:
+        out.append(f"\n{Color.BOLD}Test 9: Whitespace-Only Username{Color.RESET}")
+        out.append(_BAR60)
 
-    whitespace_username = "     "
+        whitespace_username = "     "
 
-    try:
-        _, player_id, status = send_connect_req(host, port, whitespace_username)
+        try:
+            _, player_id, status = send_connect_req(host, port, whitespace_username)
 
-        # Server trims whitespace, so this becomes empty and is rejected
-        if status == 2:  # BadUsername
-            print(f"{Color.GREEN}✓{Color.RESET} Correctly rejected (trimmed to empty)")
-            print(f"  Status: {status_name(status)}")
-            return True
-        else:
-            print(f"{Color.YELLOW}!{Color.RESET} Unexpected status: {status_name(status)}")
-            return False
+            # Server trims whitespace, so this becomes empty and is rejected
+            if status == 2:  # BadUsername
+                out.append(f"{_OK} Correctly rejected (trimmed to empty)")
+                out.append(f"  Status: {status_name(status)}")
+                return True
+            else:
+                out.append(f"{_WARN} Unexpected status: {status_name(status)}")
+                return False
 
-    except Exception as e:
-        print(f"{Color.RED}✗{Color.RESET} Error: {e}")
-        return False
+        except Exception as e:
+            out.append(f"{_FAIL} Error: {e}")
+            return False
 
 
 def test_username_with_spaces(host: str, port: int) -> bool:
     """Test username with leading/trailing spaces (should be trimmed)."""
-    print(f"\n{Color.BOLD}Test 10: Username with Spaces{Color.RESET}")
-    print("=" * 60)
+    with _buffered_output() as out:
+        out.append(f"\n{Color.BOLD}Test 10: Username with Spaces{Color.RESET}")
+        out.append(_BAR60)
 
-    spaced_username = "  Player  "
+        spaced_username = "  Player  "
 
-    try:
-        sock, player_id, status = send_connect_req(host, port, spaced_username)
+        try:
+            sock, player_id, status = send_connect_req(host, port, spaced_username)
 
-        if status == 0:
-            print(f"{Color.GREEN}✓{Color.RESET} Server accepted (trimmed to 'Player')")
-            print(f"  Player ID: {player_id}")
-            if sock:
-                sock.close()
-            return True
-        else:
-            print(f"{Color.RED}✗{Color.RESET} Server rejected: {status_name(status)}")
-            return False
+            if status == 0:
+                out.append(f"{_OK} Server accepted (trimmed to 'Player')")
+                out.append(f"  Player ID: {player_id}")
+                if sock:
+                    sock.close()
+                return True
+            else:
+                out.append(f"{_FAIL} Server rejected: {status_name(status)}")
+                return False
 
-    except Exception as e:
-        print(f"{Color.RED}✗{Color.RESET} Error: {e}")
-        return False
+        except Exception as e:
+            out.append(f"{_FAIL} Error: {e}")
+            return False
 
 
-def test_malformed_packet(host: str, port: int) -> bool:
+def test_malformed_packet(host: str, port: int,
+                          reply_window: float = _NO_REPLY_WINDOW) -> bool:
     """Test packet with incorrect size field."""
-    print(f"\n{Color.BOLD}Test 11: Malformed Packet{Color.RESET}")
-    print("=" * 60)
-
-    try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(3.0)
-        sock.connect((host, port))
+    with _buffered_output() as out:
+        out.append(f"\n{Color.BOLD}Test 11: Malformed Packet{Color.RESET}")
+        out.append(_BAR60)
 
-        # Build packet with wrong payload size
-        header = struct.pack(
-            '<BHBIB',
-            0x01,  # op_code
-            50,    # wrong payload_size (should be 32)
-            0, 0, 1
-        ) + b'\x00\x00\x00'
-
-        username_bytes = b'Test'.ljust(32, b'\x00')
-        packet = header + username_bytes
-
-        sock.send(packet)
-
-        # Server may reject or close connection
-        sock.settimeout(2.0)
         try:
-            response = sock.recv(1024)
-            if response:
-                print(f"{Color.YELLOW}!{Color.RESET} Server responded to malformed packet")
-        except socket.timeout:
-            print(f"{Color.GREEN}✓{Color.RESET} Server did not respond (expected)")
+            sock = _make_sock(3.0)
+            sock.connect((host, port))
 
-        sock.close()
-        return True
+            # Packet with wrong payload size
+            sock.send(_MALFORMED_CONNECT_REQ)
 
-    except Exception as e:
-        print(f"{Color.GREEN}✓{Color.RESET} Connection closed (expected): {e}")
-        return True
+            # Server may reject or close connection
+            if _readable_soon(sock, reply_window):
+                response = sock.recv(1024)
+                if response:
+                    out.append(f"{_WARN} Server responded to malformed packet")
+            else:
+                out.append(f"{_OK} Server did not respond (expected)")
 
+            sock.close()
+            return True
 
-def test_invalid_opcode(host: str, port: int) -> bool:
-    """Test packet with invalid OpCode."""
-    print(f"\n{Color.BOLD}Test 12: Invalid OpCode{Color.RESET}")
-    print("=" * 60)
+        except Exception as e:
+            out.append(f"{_OK} Connection closed (expected): {e}")
+            return True
 
-    try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(3.0)
-        sock.connect((host, port))
 
-        # Invalid OpCode
-        header = struct.pack(
-            '<BHBIB',
-            0xFF,  # invalid op_code
-            32, 0, 0, 1
-        ) + b'\x00\x00\x00'
+def test_invalid_opcode(host: str, port: int,
+                        reply_window: float = _NO_REPLY_WINDOW) -> bool:
+    """Test packet with invalid OpCode."""
+    with _buffered_output() as out:
+        out.append(f"\n{Color.BOLD}Test 12: Invalid OpCode{Color.RESET}")
+        out.append(_BAR60)
 
-        username_bytes = b'Test'.ljust(32, b'\x00')
-        packet = header + username_bytes
+        try:
+            sock = _make_sock(3.0)
+            sock.connect((host, port))
 
-        sock.send(packet)
+            # Invalid OpCode
+            sock.send(_INVALID_OPCODE_PACKET)
 
-        sock.settimeout(2.0)
-        try:
-            response = sock.recv(1024)
-            if response:
-                print(f"{Color.YELLOW}!{Color.RESET} Server responded")
-        except socket.timeout:
-            print(f"{Color.GREEN}✓{Color.RESET} Server ignored invalid OpCode")
+            if _readable_soon(sock, reply_window):
+                response = sock.recv(1024)
+                if response:
+                    out.append(f"{_WARN} Server responded")
+            else:
+                out.append(f"{_OK} Server ignored invalid OpCode")
 
-        sock.close()
-        return True
+            sock.close()
+            return True
 
-    except Exception as e:
-        print(f"{Color.GREEN}✓{Color.RESET} Connection handled: {e}")
-        return True
+        except Exception as e:
+            out.append(f"{_OK} Connection handled: {e}")
+            return True
 
 
-def test_partial_packet(host: str, port: int) -> bool:
+def test_partial_packet(host: str, port: int,
+                        reply_window: float = _NO_REPLY_WINDOW) -> bool:
     """Test sending incomplete packet."""
-    print(f"\n{Color.BOLD}Test 13: Partial Packet{Color.RESET}")
-    print("=" * 60)
-
-    try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(3.0)
-        sock.connect((host, port))
+    with _buffered_output() as out:
+        out.append(f"\n{Color.BOLD}Test 13: Partial Packet{Color.RESET}")
+        out.append(_BAR60)
 
-        # Send only header (12 bytes), no payload
-        packet = build_connect_req("Test")
-        partial = packet[:12]
+        try:
+            sock = _make_sock(3.0)
+            sock.connect((host, port))
 
-        sock.send(partial)
+            # Send only header (12 bytes), no payload
+            sock.send(_CONNECT_REQ_HEADER)
 
-        sock.settimeout(2.0)
-        try:
-            response = sock.recv(1024)
-            if response:
-                print(f"{Color.RED}✗{Color.RESET} Server responded to partial packet")
-                return False
-        except socket.timeout:
-            print(f"{Color.GREEN}✓{Color.RESET} Server waiting for complete packet")
+            if _readable_soon(sock, reply_window):
+                response = sock.recv(1024)
+                if response:
+                    out.append(f"{_FAIL} Server responded to partial packet")
+                    return False
+            else:
+                out.append(f"{_OK} Server waiting for complete packet")
 
-        sock.close()
-        return True
+            sock.close()
+            return True
 
-    except Exception as e:
-        print(f"{Color.GREEN}✓{Color.RESET} Connection behavior: {e}")
-        return True
+        except Exception as e:
+            out.append(f"{_OK} Connection behavior: {e}")
+            return True
 
 
 def test_reconnection(host: str, port: int) -> bool:
     """Test client reconnecting after disconnect."""
-    print(f"\n{Color.BOLD}Test 14: Reconnection{Color.RESET}")
-    print("=" * 60)
+    with _buffered_output() as out:
+        out.append(f"\n{Color.BOLD}Test 14: Reconnection{Color.RESET}")
+        out.append(_BAR60)
 
-    username = "ReconnectTest"
+        username = "ReconnectTest"
 
-    try:
-        # First connection
-        sock1, player_id1, status1 = send_connect_req(host, port, username)
-        if status1 != 0:
-            print(f"{Color.RED}✗{Color.RESET} First connection failed")
-            return False
+        try:
+            # First connection
+            sock1, player_id1, status1 = send_connect_req(host, port, username)
+            if status1 != 0:
+                out.append(f"{_FAIL} First connection failed")
+                return False
 
-        print(f"{Color.GREEN}✓{Color.RESET} First connection: ID={player_id1}")
-        sock1.close()
-        time.sleep(0.3)
+            out.append(f"{_OK} First connection: ID={player_id1}")
+            _abort(sock1)
 
-        # Reconnect
-        sock2, player_id2, status2 = send_connect_req(host, port, username)
-        if status2 != 0:
-            print(f"{Color.RED}✗{Color.RESET} Reconnection failed")
-            return False
+            # Reconnect
+            sock2, player_id2, status2 = send_connect_req(host, port, username)
+            if status2 != 0:
+                out.append(f"{_FAIL} Reconnection failed")
+                return False
 
-        print(f"{Color.GREEN}✓{Color.RESET} Reconnection successful: ID={player_id2}")
-        sock2.close()
+            out.append(f"{_OK} Reconnection successful: ID={player_id2}")
+            sock2.close()
 
-        return True
+            return True
 
-    except Exception as e:
-        print(f"{Color.RED}✗{Color.RESET} Error: {e}")
-        return False
+        except Exception as e:
+            out.append(f"{_FAIL} Error: {e}")
+            return False
 
 
 def test_rapid_reconnections(host: str, port: int) -> bool:
     """Test rapid connection/disconnection cycles."""
-    print(f"\n{Color.BOLD}Test 15: Rapid Reconnections{Color.RESET}")
-    print("=" * 60)
+    with _buffered_output() as out:
+        out.append(f"\n{Color.BOLD}Test 15: Rapid Reconnections{Color.RESET}")
+        out.append(_BAR60)
 
-    cycles = 5
-    username = "RapidReconnect"
-    
-    try:
-        for i in range(cycles):
-            # Connect
-            sock, player_id, status = send_connect_req(host, port, username)
-            
-            if status != 0:
-                print(f"{Color.RED}✗ Cycle {i + 1}/{cycles} failed to connect (Status={status}){Color.RESET}")
-                if sock:
-                    sock.close()
-                return False
-            
-            # Immediately disconnect
-            sock.close()
-            
-            # Small delay to let server process disconnect
-            time.sleep(0.05)
+        cycles = 5
+        packet = build_connect_req("RapidReconnect")
+
+        try:
+            for i in range(cycles):
+                # Connect
+                sock, player_id, status = send_connect_req_raw(host, port, packet)
         
-        print(f"{Color.GREEN}✓{Color.RESET} Completed {cycles} rapid reconnection cycles")
-        return True
+                if status != 0:
+                    out.append(f"{Color.RED}✗ Cycle {i + 1}/{cycles} failed to connect (Status={status}){Color.RESET}")
+                    if sock:
+                        sock.close()
+                    return False
         
-    except Exception as e:
-        print(f"{Color.RED}✗{Color.RESET} Exception during rapid reconnections: {e}")
-        return False
+                # Immediately disconnect
+                _abort(sock)
+    
+            out.append(f"{_OK} Completed {cycles} rapid reconnection cycles")
+            return True
+    
+        except Exception as e:
+            out.append(f"{_FAIL} Exception during rapid reconnections: {e}")
+            return False
 
 def test_concurrent_connections(host: str, port: int, count: int = 4) -> bool:
     """Test multiple clients connecting simultaneously."""
-    print(f"\n{Color.BOLD}Test 16: Concurrent Connections ({count} clients){Color.RESET}")
-    print("=" * 60)
-
-    results = []
+    with _buffered_output() as out:
+        out.append(f"\n{Color.BOLD}Test 16: Concurrent Connections ({count} clients){Color.RESET}")
+        out.append(_BAR60)
 
-    def connect_client(client_id: int):
-        try:
-            sock, player_id, status = send_connect_req(
-                host, port, f"Concurrent{client_id}"
-            )
-            results.append((client_id, player_id, status, sock))
-        except Exception as e:
-            results.append((client_id, None, None, None))
+        packets = [build_connect_req(f"Concurrent{i}") for i in range(count)]
 
-    # Start threads
-    threads = []
-    for i in range(count):
-        t = threading.Thread(target=connect_client, args=(i,))
-        threads.append(t)
-        t.start()
+        async def run_clients():
+            # All handshakes are multiplexed on this thread's event loop
+            results = await asyncio.gather(
+                *(_async_connect(host, port, packet) for packet in packets),
+                return_exceptions=True)
 
-    # Wait for completion
-    for t in threads:
-        t.join()
+            # Count and clean up in one pass (while the loop that owns the
+            # connections is running)
+            successful = 0
+            for result in results:
+                if isinstance(result, BaseException):
+                    continue
+                _, status, writer = result
+                if status == 0:
+                    successful += 1
+                writer.close()
 
-    # Check results
-    successful = sum(1 for _, _, status, _ in results if status == 0)
+            return successful
 
-    print(f"  Successful: {successful}/{count}")
+        successful = asyncio.run(run_clients())
 
-    # Cleanup
-    for _, _, _, sock in results:
-        if sock:
-            sock.close()
+        out.append(f"  Successful: {successful}/{count}")
 
-    if successful == count:
-        print(f"{Color.GREEN}✓{Color.RESET} All concurrent connections succeeded")
-        return True
-    elif successful > 0:
-        print(f"{Color.YELLOW}!{Color.RESET} Partial success: {successful}/{count}")
-        return True
-    else:
-        print(f"{Color.RED}✗{Color.RESET} All connections failed")
-        return False
+        if successful == count:
+            out.append(f"{_OK} All concurrent connections succeeded")
+            return True
+        elif successful > 0:
+            out.append(f"{_WARN} Partial success: {successful}/{count}")
+            return True
+        else:
+            out.append(f"{_FAIL} All connections failed")
+            return False
 
 
 def test_ready_and_game_start(host: str, port: int, num_clients: int = 2) -> bool:
     """Test that server sends GAME_START when all clients are ready."""
-    print(f"\n{Color.BOLD}Test 17: Ready Status and Game Start ({num_clients} clients){Color.RESET}")
-    print("=" * 60)
+    with _buffered_output() as out:
+        out.append(f"\n{Color.BOLD}Test 17: Ready Status and Game Start ({num_clients} clients){Color.RESET}")
+        out.append(_BAR60)
 
-    sockets = []
-    player_ids = []
+        sockets = []
+        player_ids = []
 
-    try:
-        # Connect all clients
-        for i in range(1, num_clients + 1):
-            username = f"Ready{i}"
-            sock, player_id, status = send_connect_req(host, port, username, timeout=5.0)
-            
-            if status != 0:
-                print(f"{Color.RED}✗{Color.RESET} {username} connection failed: {status_name(status)}")
-                for s in sockets:
-                    s.close()
-                return False
-            
-            sockets.append(sock)
-            player_ids.append(player_id)
-            print(f"{Color.GREEN}✓{Color.RESET} {username:12s} connected (ID={player_id})")
-            time.sleep(0.1)
-
-        # Mark all clients as ready
-        print(f"\nMarking all {num_clients} clients as ready...")
-        for i, sock in enumerate(sockets):
-            ready_packet = build_ready_status(True)
-            sock.send(ready_packet)
-            print(f"  Sent READY_STATUS to Player {player_ids[i]}")
-            time.sleep(0.1)
-
-        # Wait for GAME_START from server
-        print("\nWaiting for GAME_START from server...")
-        game_start_received = [False] * num_clients
+        try:
+            # Connect all clients
+            for i in range(1, num_clients + 1):
+                username = f"Ready{i}"
+                sock, player_id, status = send_connect_req(host, port, username, timeout=5.0)
         
-        for i, sock in enumerate(sockets):
-            sock.settimeout(3.0)
-            try:
-                response = sock.recv(1024)
-                if len(response) >= 12:
-                    op_code = parse_game_start(response)
-                    if op_code == 0x05:
-                        game_start_received[i] = True
-                        print(f"{Color.GREEN}✓{Color.RESET} Player {player_ids[i]} received GAME_START")
-                    else:
-                        print(f"{Color.YELLOW}!{Color.RESET} Player {player_ids[i]} received OpCode 0x{op_code:02x} (expected 0x05)")
-                else:
-                    print(f"{Color.YELLOW}!{Color.RESET} Player {player_ids[i]} received incomplete packet ({len(response)} bytes)")
-            except socket.timeout:
-                print(f"{Color.RED}✗{Color.RESET} Player {player_ids[i]} timeout waiting for GAME_START")
-
-        # Check results
-        all_received = all(game_start_received)
+                if status != 0:
+                    out.append(f"{_FAIL} {username} connection failed: {status_name(status)}")
+                    for s in sockets:
+                        s.close()
+                    return False
         
-        if all_received:
-            print(f"\n{Color.GREEN}✓{Color.RESET} All {num_clients} clients received GAME_START packet")
-            result = True
-        else:
-            received_count = sum(game_start_received)
-            print(f"\n{Color.RED}✗{Color.RESET} Only {received_count}/{num_clients} clients received GAME_START")
-            result = False
+                sockets.append(sock)
+                player_ids.append(player_id)
+                out.append(f"{_OK} {username:12s} connected (ID={player_id})")
+
+            # Mark all clients as ready
+            out.append(f"\nMarking all {num_clients} clients as ready...")
+            for i, sock in enumerate(sockets):
+                ready_packet = build_ready_status(True)
+                sock.send(ready_packet)
+                out.append(f"  Sent READY_STATUS to Player {player_ids[i]}")
+
+            # Wait for GAME_START from server
+            out.append("\nWaiting for GAME_START from server...")
+            game_start_received = [False] * num_clients
+
+            # Drain every client from one select() against a shared 3s deadline,
+            # instead of blocking on each socket in turn
+            sock_to_idx = {s.fileno(): i for i, s in enumerate(sockets)}
+            pending = set(sockets)
+            deadline = time.monotonic() + 3.0
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                readable, _, _ = select.select(list(pending), [], [], remaining)
+                for sock in readable:
+                    pending.discard(sock)
+                    i = sock_to_idx[sock.fileno()]
+                    response = sock.recv(1024)
+                    if len(response) >= 12:
+                        op_code = parse_game_start(response)
+                        if op_code == 0x05:
+                            game_start_received[i] = True
+                            out.append(f"{_OK} Player {player_ids[i]} received GAME_START")
+                        else:
+                            out.append(f"{_WARN} Player {player_ids[i]} received OpCode 0x{op_code:02x} (expected 0x05)")
+                    else:
+                        out.append(f"{_WARN} Player {player_ids[i]} received incomplete packet ({len(response)} bytes)")
 
-        # Cleanup
-        for sock in sockets:
-            sock.close()
+            for sock in pending:
+                i = sock_to_idx[sock.fileno()]
+                out.append(f"{_FAIL} Player {player_ids[i]} timeout waiting for GAME_START")
 
-        return result
+            # Check results
+            all_received = all(game_start_received)
+    
+            if all_received:
+                out.append(f"\n{_OK} All {num_clients} clients received GAME_START packet")
+                result = True
+            else:
+                received_count = sum(game_start_received)
+                out.append(f"\n{_FAIL} Only {received_count}/{num_clients} clients received GAME_START")
+                result = False
 
-    except Exception as e:
-        print(f"{Color.RED}✗{Color.RESET} Error: {e}")
-        for sock in sockets:
-            try:
+            # Cleanup
+            for sock in sockets:
                 sock.close()
-            except:
-                pass
-        return False
+
+            return result
+
+        except Exception as e:
+            out.append(f"{_FAIL} Error: {e}")
+            for sock in sockets:
+                try:
+                    sock.close()
+                except:
+                    pass
+            return False
 
 
 def main():
@@ -814,13 +1116,20 @@ def main():
                                 'edge', 'ready', 'all'],
                         default='all',
                         help='Test category to run (default: all)')
+    parser.add_argument('--reply-window', type=float, default=_NO_REPLY_WINDOW,
+                        metavar='SECONDS',
+                        help='Seconds the malformed/invalid-opcode/partial tests '
+                             'wait for a reply that should not come; a slower '
+                             'reply counts as none, so raise it above the round '
+                             'trip for a remote server '
+                             f'(default: {_NO_REPLY_WINDOW})')
 
     args = parser.parse_args()
 
     print(f"{Color.BOLD}{Color.BLUE}")
-    print("=" * 70)
+    print(_BAR70)
     print("R-Type Server TCP Connection Tests")
-    print("=" * 70)
+    print(_BAR70)
     print(f"{Color.RESET}")
     print(f"Server: {args.host}:{args.port}\n")
 
@@ -831,11 +1140,14 @@ def main():
         if args.test in ('basic', 'all'):
             results['basic'] = test_basic_connection(args.host, args.port)
 
-        if args.test in ('multi', 'all'):
-            results['multi'] = test_multiple_clients(args.host, args.port, 4)
+        # Multiple clients and server full share the same 4 connections
+        if args.test in ('multi', 'full', 'all'):
+            with ServerFixture(args.host, args.port, 4) as filled:
+                if args.test in ('multi', 'all'):
+                    results['multi'] = test_multiple_clients(filled)
 
-        if args.test in ('full', 'all'):
-            results['full'] = test_server_full(args.host, args.port)
+                if args.test in ('full', 'all'):
+                    results['full'] = test_server_full(args.host, args.port, filled)
 
         if args.test in ('duplicate', 'all'):
             results['duplicate'] = test_duplicate_username(args.host, args.port)
@@ -849,15 +1161,39 @@ def main():
 
         # Edge case tests
         if args.test in ('edge', 'all'):
-            results['long_username'] = test_long_username(args.host, args.port)
-            results['special_chars'] = test_special_characters(args.host, args.port)
-            results['emoji'] = test_emoji_username(args.host, args.port)
-            results['whitespace'] = test_whitespace_username(args.host, args.port)
-            results['spaces'] = test_username_with_spaces(args.host, args.port)
-            results['malformed'] = test_malformed_packet(args.host, args.port)
-            results['invalid_opcode'] = test_invalid_opcode(args.host, args.port)
-            results['partial'] = test_partial_packet(args.host, args.port)
-            results['reconnection'] = test_reconnection(args.host, args.port)
+            # Single-client tests with distinct usernames run in parallel
+            independent = [
+                ('long_username', test_long_username),
+                ('special_chars', test_special_characters),
+                ('emoji', test_emoji_username),
+                ('whitespace', test_whitespace_username),
+                ('spaces', test_username_with_spaces),
+                ('reconnection', test_reconnection),
+            ]
+            with ThreadPoolExecutor(max_workers=_PARALLEL_WORKERS) as ex:
+                futures = {name: ex.submit(_run_captured, fn, args.host, args.port)
+                           for name, fn in independent}
+
+            def report(name):
+                """Write a pooled test's output and return its result."""
+                result, out = futures[name].result()
+                _write_output(out)
+                return result
+
+            # Report in the usual test order, not completion order; tests
+            # sharing usernames or filling the server stay serial
+            results['long_username'] = report('long_username')
+            results['special_chars'] = report('special_chars')
+            results['emoji'] = report('emoji')
+            results['whitespace'] = report('whitespace')
+            results['spaces'] = report('spaces')
+            results['malformed'] = test_malformed_packet(
+                args.host, args.port, args.reply_window)
+            results['invalid_opcode'] = test_invalid_opcode(
+                args.host, args.port, args.reply_window)
+            results['partial'] = test_partial_packet(
+                args.host, args.port, args.reply_window)
+            results['reconnection'] = report('reconnection')
             results['rapid_reconnect'] = test_rapid_reconnections(args.host, args.port)
             results['concurrent'] = test_concurrent_connections(args.host, args.port, 4)
 
@@ -867,7 +1203,7 @@ def main():
 
     # Summary
     print(f"\n{Color.BOLD}Summary{Color.RESET}")
-    print("=" * 70)
+    print(_BAR70)
 
     passed = sum(1 for v in results.values() if v)
     total = len(results)